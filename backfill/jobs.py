@@ -0,0 +1,87 @@
+import argparse
+from datetime import date
+
+import requests
+
+from backfill.work_queue import BackfillWorkQueue
+from commodity_futures_trading_commission.commitments_of_traders_historical import COTDataFetcher, COTReportType
+from us_treasury_department.treasury_interest_rates_historical import InterestRatesType, \
+    TreasuryInterestRatesHistorical
+
+COT_JOB = "cot"
+TREASURY_JOB = "treasury"
+DEFAULT_DB_PATH = "backfill.sqlite3"
+
+
+def _enqueue(queue: BackfillWorkQueue, job, type_name, units):
+    """Enqueue units and re-queue the current year's unit, whose source file is still being updated."""
+    added = queue.enqueue(job, units)
+    current_year_key = f"{type_name}:{date.today().year}"
+    if current_year_key in units:
+        queue.requeue(job, [current_year_key])
+    return added
+
+
+def plan_cot(queue: BackfillWorkQueue, report_type: COTReportType, start_year: int):
+    """Enqueue one unit per COT report type x year (the bundled historical range is a single unit)."""
+    url_list = COTDataFetcher.build_url_list(report_type, start_year)
+    units = {f"{report_type.name}:{key}": {"report_type": report_type.name, "key": key, "url": url}
+             for key, url in url_list.items()}
+    return _enqueue(queue, COT_JOB, report_type.name, units)
+
+
+def plan_treasury(queue: BackfillWorkQueue, interest_rates_type: InterestRatesType, start_year: int, end_year: int):
+    """Enqueue one unit per interest rate type x year."""
+    url_list = TreasuryInterestRatesHistorical.build_url_list(interest_rates_type, start_year, end_year)
+    units = {f"{interest_rates_type.name}:{key}": {"rates_type": interest_rates_type.value[0], "key": key, "url": url}
+             for key, url in url_list.items()}
+    return _enqueue(queue, TREASURY_JOB, interest_rates_type.name, units)
+
+
+def run_worker(queue: BackfillWorkQueue, worker_id=None, job=None):
+    """Process units from the queue until it is drained, sharing one HTTP session across units."""
+    with requests.Session() as session:
+        handlers = {
+            COT_JOB: lambda payload: COTDataFetcher.download(session, payload["key"], payload["url"]),
+            TREASURY_JOB: lambda payload: TreasuryInterestRatesHistorical.download(
+                session, payload["key"], payload["url"], payload["rates_type"]),
+        }
+        queue.work(handlers, worker_id=worker_id, job=job)
+
+
+if __name__ == "__main__":
+    # Plan once, then start any number of workers (on this or other hosts sharing --db):
+    #   python -m backfill.jobs plan --cot-start 2006 --treasury-start 1990 --treasury-end 2025
+    #   python -m backfill.jobs work
+    # Re-running plan re-queues the current year; other units can be re-downloaded with requeue:
+    #   python -m backfill.jobs requeue --job cot --keys Commodity_Index_Trader_Supplement:2024
+    parser = argparse.ArgumentParser(description="Resumable COT and Treasury backfills.")
+    parser.add_argument("command", choices=["plan", "work", "status", "retry-failed", "requeue"])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite queue file shared by all workers")
+    parser.add_argument("--job", choices=[COT_JOB, TREASURY_JOB])
+    parser.add_argument("--worker-id")
+    parser.add_argument("--cot-start", type=int)
+    parser.add_argument("--treasury-start", type=int)
+    parser.add_argument("--treasury-end", type=int)
+    parser.add_argument("--keys", nargs="+", default=[], help="Unit keys to requeue, e.g. <type name>:<year>")
+    args = parser.parse_args()
+
+    work_queue = BackfillWorkQueue(args.db)
+    if args.command == "plan":
+        added = 0
+        if args.cot_start and args.job in (None, COT_JOB):
+            for cot_report_type in COTReportType:
+                added += plan_cot(work_queue, cot_report_type, args.cot_start)
+        if args.treasury_start and args.treasury_end and args.job in (None, TREASURY_JOB):
+            for rates_type in InterestRatesType:
+                added += plan_treasury(work_queue, rates_type, args.treasury_start, args.treasury_end)
+        print(f"Enqueued {added} new units.")
+    elif args.command == "work":
+        run_worker(work_queue, worker_id=args.worker_id, job=args.job)
+    elif args.command == "retry-failed":
+        print(f"Reset {work_queue.retry_failed(args.job)} failed units.")
+    elif args.command == "requeue":
+        if not args.job:
+            parser.error("requeue requires --job")
+        print(f"Requeued {work_queue.requeue(args.job, args.keys)} units.")
+    print(work_queue.progress(args.job))
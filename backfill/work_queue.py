@@ -0,0 +1,252 @@
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    job TEXT NOT NULL,
+    unit_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, unit_key)
+)
+"""
+
+
+@dataclass
+class WorkUnit:
+    job: str
+    unit_key: str
+    payload: dict
+    attempts: int
+
+
+class BackfillWorkQueue:
+    """Durable SQLite-backed queue of backfill work units.
+
+    Workers on several processes (or hosts sharing the database file) claim units under a lease,
+    mark them done when finished, and failed units are retried with exponential backoff.
+    A unit whose lease expires (e.g. the worker died) becomes claimable again, unless it has used
+    up its attempts. While a handler runs, the worker renews its lease in the background.
+    """
+
+    def __init__(self, db_path, lease_seconds=600, max_attempts=5, backoff_base=30, backoff_cap=3600):
+        """
+        :param db_path: Path to the SQLite database file shared by all workers.
+        :param lease_seconds: How long a claimed unit stays reserved without a renewal; workers renew
+            every third of this while a handler runs, so it only needs to outlast a stalled worker.
+        :param max_attempts: Attempts after which a unit is marked failed for good.
+        :param backoff_base: Delay in seconds before the first retry, doubled on each further attempt.
+        :param backoff_cap: Upper bound in seconds for the retry delay.
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode so claims can take the write lock up front with BEGIN IMMEDIATE; closing the
+        # connection rolls back anything left open. The default rollback journal is kept on purpose:
+        # WAL does not work on network filesystems.
+        return closing(sqlite3.connect(self.db_path, timeout=60, isolation_level=None))
+
+    def enqueue(self, job, units):
+        """Add units to a job; units already present (in any state) are left untouched.
+        :param job: Job name, e.g. "cot" or "treasury".
+        :param units: Mapping of unit key to JSON-serializable payload.
+        :return: Number of newly added units.
+        """
+        now = time.time()
+        rows = [(job, unit_key, json.dumps(payload), now) for unit_key, payload in units.items()]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO work_units (job, unit_key, payload, updated_at) "
+                             "VALUES (?, ?, ?, ?)", rows)
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        return added
+
+    def requeue(self, job, unit_keys):
+        """Reset done or failed units so they are downloaded again (e.g. the current year's file).
+        Units currently leased by a worker are left alone.
+        :return: Number of units reset.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany("UPDATE work_units SET status = ?, attempts = 0, next_attempt_at = 0, last_error = NULL, "
+                             "updated_at = ? WHERE job = ? AND unit_key = ? AND status IN (?, ?)",
+                             [(PENDING, now, job, unit_key, DONE, FAILED) for unit_key in unit_keys])
+            reset = conn.total_changes - before
+            conn.execute("COMMIT")
+        return reset
+
+    def claim(self, worker_id, job=None):
+        """Claim the next available unit, or return None if nothing is claimable right now."""
+        now = time.time()
+        query = ("SELECT job, unit_key, payload, attempts FROM work_units "
+                 "WHERE ((status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_expires < ?))")
+        params = [PENDING, now, RUNNING, now]
+        if job:
+            query += " AND job = ?"
+            params.append(job)
+        query += " ORDER BY next_attempt_at, unit_key LIMIT 1"
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # A unit whose lease expired after its last allowed attempt most likely kills its worker; stop here.
+            conn.execute("UPDATE work_units SET status = ?, last_error = ?, lease_owner = NULL, lease_expires = NULL, "
+                         "updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                         (FAILED, "Lease expired on final attempt", now, RUNNING, now, self.max_attempts))
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            unit_job, unit_key, payload, attempts = row
+            conn.execute("UPDATE work_units SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                         "lease_expires = ?, updated_at = ? WHERE job = ? AND unit_key = ?",
+                         (RUNNING, worker_id, now + self.lease_seconds, now, unit_job, unit_key))
+            conn.execute("COMMIT")
+        return WorkUnit(unit_job, unit_key, json.loads(payload), attempts + 1)
+
+    def renew(self, unit, worker_id):
+        """Extend the lease on a unit. Returns False if the lease was lost to another worker."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE work_units SET lease_expires = ?, updated_at = ? "
+                                  "WHERE job = ? AND unit_key = ? AND status = ? AND lease_owner = ?",
+                                  (now + self.lease_seconds, now, unit.job, unit.unit_key, RUNNING, worker_id))
+        return cursor.rowcount == 1
+
+    def _heartbeat(self, unit, worker_id, stop):
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.renew(unit, worker_id):
+                    print(f"[{worker_id}] Lease on {unit.job}/{unit.unit_key} was lost")
+                    return
+            except sqlite3.Error as e:
+                print(f"[{worker_id}] Failed to renew lease on {unit.job}/{unit.unit_key}: {e}")
+
+    def complete(self, unit, worker_id):
+        """Checkpoint a unit as done. Returns False if the lease was lost to another worker."""
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE work_units SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                                  "last_error = NULL, updated_at = ? "
+                                  "WHERE job = ? AND unit_key = ? AND status = ? AND lease_owner = ?",
+                                  (DONE, time.time(), unit.job, unit.unit_key, RUNNING, worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, unit, worker_id, error):
+        """Record a failed attempt and schedule a retry, or mark the unit failed once attempts run out."""
+        now = time.time()
+        if unit.attempts >= self.max_attempts:
+            status, next_attempt_at = FAILED, now
+        else:
+            delay = min(self.backoff_cap, self.backoff_base * 2 ** (unit.attempts - 1))
+            status, next_attempt_at = PENDING, now + delay * random.uniform(0.8, 1.2)
+
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE work_units SET status = ?, next_attempt_at = ?, last_error = ?, "
+                                  "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                                  "WHERE job = ? AND unit_key = ? AND status = ? AND lease_owner = ?",
+                                  (status, next_attempt_at, str(error), now,
+                                   unit.job, unit.unit_key, RUNNING, worker_id))
+        return cursor.rowcount == 1
+
+    def retry_failed(self, job=None):
+        """Reset units that exhausted their attempts so they are picked up again."""
+        query = ("UPDATE work_units SET status = ?, attempts = 0, next_attempt_at = 0, last_error = NULL, "
+                 "updated_at = ? WHERE status = ?")
+        params = [PENDING, time.time(), FAILED]
+        if job:
+            query += " AND job = ?"
+            params.append(job)
+        with self._connect() as conn:
+            cursor = conn.execute(query, params)
+        return cursor.rowcount
+
+    def progress(self, job=None):
+        """Return unit counts per status."""
+        query = "SELECT status, COUNT(*) FROM work_units"
+        params = []
+        if job:
+            query += " WHERE job = ?"
+            params.append(job)
+        query += " GROUP BY status"
+        with self._connect() as conn:
+            counts = dict(conn.execute(query, params).fetchall())
+        return {status: counts.get(status, 0) for status in (PENDING, RUNNING, DONE, FAILED)}
+
+    def _next_wakeup(self, job=None):
+        """Seconds until some unit may become claimable, or None if every unit is done or failed."""
+        query = ("SELECT MIN(CASE WHEN status = ? THEN next_attempt_at ELSE lease_expires END) "
+                 "FROM work_units WHERE status IN (?, ?)")
+        params = [PENDING, PENDING, RUNNING]
+        if job:
+            query += " AND job = ?"
+            params.append(job)
+        with self._connect() as conn:
+            wakeup = conn.execute(query, params).fetchone()[0]
+        if wakeup is None:
+            return None
+        return max(0.0, wakeup - time.time())
+
+    def work(self, handlers, worker_id=None, job=None, poll_interval=5):
+        """Claim and process units until the queue is drained.
+        :param handlers: Mapping of job name to a callable taking the unit payload; raising marks the attempt failed.
+        :param worker_id: Identifier stored on claimed units (defaults to host:pid).
+        :param job: Restrict this worker to a single job.
+        :param poll_interval: Maximum sleep between polls while waiting on backoff or other workers' leases.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            unit = self.claim(worker_id, job)
+            if unit is None:
+                wait = self._next_wakeup(job)
+                if wait is None:
+                    print(f"[{worker_id}] Queue drained: {self.progress(job)}")
+                    return
+                time.sleep(min(wait, poll_interval) + 0.1)
+                continue
+
+            print(f"[{worker_id}] Processing {unit.job}/{unit.unit_key} (attempt {unit.attempts})")
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(unit, worker_id, stop), daemon=True)
+            heartbeat.start()
+            error = None
+            try:
+                handlers[unit.job](unit.payload)
+            except Exception as e:
+                error = e
+            finally:
+                stop.set()
+                heartbeat.join()
+
+            if error is not None:
+                print(f"[{worker_id}] Failed {unit.job}/{unit.unit_key}: {error}")
+                if not self.fail(unit, worker_id, error):
+                    print(f"[{worker_id}] Lease on {unit.job}/{unit.unit_key} was lost before failure was recorded")
+            elif not self.complete(unit, worker_id):
+                print(f"[{worker_id}] Lease on {unit.job}/{unit.unit_key} was lost before completion was recorded")
@@ -28,6 +28,21 @@ class COTDataFetcher:
         :param report_type: Type of COT report (Enum)
         :param start_year: Year from which to start downloading
         """
+        url_list = COTDataFetcher.build_url_list(report_type, start_year)
+        with requests.Session() as session:
+            for key, url in url_list.items():
+                print(f"Downloading: {url}")
+                try:
+                    COTDataFetcher.download(session, key, url)
+                except requests.exceptions.RequestException as e:
+                    print(f"Failed to fetch {url}: {e}")
+
+    @staticmethod
+    def build_url_list(report_type: COTReportType, start_year: int):
+        """Build the download URLs for a given report type, keyed by year (or historical range).
+        :param report_type: Type of COT report (Enum)
+        :param start_year: Year from which to start downloading
+        """
         file_prefix = report_type.value[0]
         historical_range = report_type.value[1]
         # Download historical data (if applicable)
@@ -43,16 +58,14 @@ class COTDataFetcher:
             yearly_file = f"{BASE_URL}{file_prefix}_{start_year}.zip"
             url_list[start_year] = yearly_file
             start_year += 1
+        return url_list
 
-        with requests.Session() as session:
-            for key, url in url_list.items():
-                print(f"Downloading: {url}")
-                try:
-                    response = session.get(url, timeout=10)
-                    response.raise_for_status()
-                    COTDataFetcher._process_zip(response.content, key)
-                except requests.exceptions.RequestException as e:
-                    print(f"Failed to fetch {url}: {e}")
+    @staticmethod
+    def download(session, key, url):
+        """Download a single COT ZIP and store its contents, raising on HTTP errors."""
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+        COTDataFetcher._process_zip(response.content, key)
 
     @staticmethod
     def _process_zip(zip_content, key):
@@ -1,5 +1,31 @@
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import requests
+
+# Snapshot name -> (endpoint, params) fetched together by NSEAPI.get_snapshot
+SNAPSHOT_ENDPOINTS = {
+    "market_status": ("marketStatus", None),
+    "high_low_count": ("live-analysis-52weekhighstock", None),
+    "fifty_two_week_high": ("live-analysis-data-52weekhighstock", None),
+    "fifty_two_week_low": ("live-analysis-data-52weeklowstock", None),
+    "index_performances": ("allIndices", None),
+}
+
+
+@dataclass
+class MarketSnapshot:
+    """Payloads from one batched fetch, keyed by snapshot name (None for endpoints that failed)."""
+    fetched_at: datetime
+    completed_at: Optional[datetime]
+    data: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+
+    def __getitem__(self, name):
+        return self.data[name]
 
 
 class NSEAPI:
@@ -32,17 +58,30 @@ class NSEAPI:
         except requests.RequestException as e:
             print(f"Failed to initialize session: {e}")
 
+    @staticmethod
+    def _is_blocked(response):
+        """Detect an auth failure or HTML block page without scanning the whole body."""
+        if response.status_code == 401:
+            return True
+        content_type = response.headers.get("Content-Type", "")
+        if content_type:
+            return "html" in content_type.lower()
+        return response.content[:256].lstrip().startswith(b"<")
+
+    def _get(self, endpoint, params=None):
+        url = f"{self.BASE_URL}/{endpoint}"
+        return self.session.get(url, params=params, headers=self.headers, timeout=10)
+
     def _fetch_data(self, endpoint, params=None):
         """Fetch data from NSE API endpoint with retry mechanism."""
-        url = f"{self.BASE_URL}/{endpoint}"
         try:
-            response = self.session.get(url, params=params, headers=self.headers, timeout=10)
+            response = self._get(endpoint, params)
 
-            if response.status_code == 401 or "html" in response.text.lower():
+            if self._is_blocked(response):
                 print("Unauthorized access or blocked, refreshing session...")
                 self._initialize_session()
                 time.sleep(5)  # Wait for session to stabilize
-                response = self.session.get(url, params=params, headers=self.headers, timeout=10)
+                response = self._get(endpoint, params)
 
             response.raise_for_status()
             return response.json()
@@ -50,6 +89,49 @@ class NSEAPI:
             print(f"Error fetching NSE data: {e}")
             return None
 
+    def get_snapshot(self, endpoints=None):
+        """Fetch a set of endpoints concurrently over the shared session as one snapshot.
+
+        Blocked responses are collected and the session is refreshed at most once for the whole
+        batch before those endpoints are retried.
+        :param endpoints: Mapping of snapshot name to (endpoint, params); defaults to SNAPSHOT_ENDPOINTS.
+        :return: MarketSnapshot
+        """
+        endpoints = endpoints or SNAPSHOT_ENDPOINTS
+        snapshot = MarketSnapshot(fetched_at=datetime.now(), completed_at=None)
+
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            pending = endpoints
+            for attempt in range(2):
+                futures = {name: executor.submit(self._get, endpoint, params)
+                           for name, (endpoint, params) in pending.items()}
+                blocked = {}
+                for name, future in futures.items():
+                    try:
+                        response = future.result()
+                        if self._is_blocked(response):
+                            if attempt == 0:
+                                blocked[name] = pending[name]
+                            else:
+                                snapshot.data[name] = None
+                                snapshot.errors[name] = "blocked"
+                            continue
+                        response.raise_for_status()
+                        snapshot.data[name] = response.json()
+                    except (requests.RequestException, ValueError) as e:
+                        snapshot.data[name] = None
+                        snapshot.errors[name] = str(e)
+
+                if not blocked:
+                    break
+                print(f"Blocked on {', '.join(blocked)}, refreshing session once for the batch...")
+                self._initialize_session()
+                time.sleep(5)  # Wait for session to stabilize
+                pending = blocked
+
+        snapshot.completed_at = datetime.now()
+        return snapshot
+
     def get_market_status(self):
         """Fetch market status from NSE."""
         return self._fetch_data("marketStatus")
@@ -103,3 +185,7 @@ if __name__ == "__main__":
     # Fetch index performances
     index_performance = nse_api.index_performances()
     print(index_performance)
+
+    # Fetch market status, 52-week data and index performances together
+    snapshot = nse_api.get_snapshot()
+    print(snapshot.fetched_at, snapshot["market_status"], snapshot.errors)
@@ -0,0 +1,284 @@
+import re
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+SYMBOL_FIELDS = ("symbol", "proposedTickerSymbol", "ticker")
+NAME_FIELDS = ("name", "companyName", "company", "comapnyName", "Company")
+EXCHANGE_FIELDS = ("exchange", "proposedExchange")
+# Column-label dicts in Nasdaq table payloads, e.g. {"symbol": "Symbol", "name": "Company Name"}
+HEADER_FIELDS = ("headers",)
+
+# Market each collector's symbols belong to; tickers are only unique within a market
+SOURCE_MARKETS = {
+    "nasdaq": "US",
+    "investing": "US",
+    "wsj": "US",
+    "nse": "NSE",
+}
+
+_PAREN_TICKER = re.compile(r"\(([A-Za-z0-9.\-/^]+)\)\s*$")
+_SYMBOL_SEPARATORS = re.compile(r"[\s/\-]+")
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_SHARE_CLASS_TICKER = re.compile(r"^([A-Z0-9]+)([a-z])$")
+_NAME_SUFFIX = re.compile(r" (inc|incorporated|corp|corporation|co|company|ltd|limited|plc|llc|lp|sa|nv|ag|"
+                          r"common stock|ordinary shares|american depositary shares|ads|class [a-z])$")
+_LEADING_THE = re.compile(r"^the ")
+_WHITESPACE = re.compile(r"\s+")
+# Prefix of placeholder join keys for unresolved rows; cannot clash with "<market>:<symbol>" keys
+_UNRESOLVED = "\0unresolved:"
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS symbols (symbol_key TEXT PRIMARY KEY, market TEXT NOT NULL, symbol TEXT NOT NULL, "
+    "name TEXT, exchange TEXT, source TEXT)",
+    "CREATE TABLE IF NOT EXISTS name_aliases (name_key TEXT PRIMARY KEY, symbol_key TEXT NOT NULL)",
+)
+
+
+def normalize_symbol(symbol):
+    """Normalize a ticker so "brk/a", "BRK-A" and "BRK.A" share one key."""
+    return _SYMBOL_SEPARATORS.sub(".", str(symbol).strip().upper())
+
+
+def normalize_name(name):
+    """Normalize a company name: lowercase, no punctuation or corporate suffixes ("Apple Inc. Common Stock" -> "apple")."""
+    name = _PAREN_TICKER.sub("", str(name)).lower().replace("&", " and ")
+    name = _NON_ALNUM.sub(" ", name)
+    name = _WHITESPACE.sub(" ", name).strip()
+    # Only trailing suffixes are stripped ("Co-Diagnostics" keeps its "co"), and never down to nothing
+    stripped = _NAME_SUFFIX.sub("", name)
+    while stripped != name:
+        name = stripped
+        stripped = _NAME_SUFFIX.sub("", name)
+    return _LEADING_THE.sub("", name)
+
+
+def ticker_in_parentheses(value):
+    """Extract the ticker from investing.com style names, e.g. "Apple (AAPL)" -> "AAPL".
+    A trailing lowercase share-class letter is split off the way Nasdaq writes it ("BRKb" -> "BRK.B").
+    """
+    match = _PAREN_TICKER.search(str(value))
+    if not match:
+        return None
+    ticker = match.group(1)
+    share_class = _SHARE_CLASS_TICKER.match(ticker)
+    if share_class:
+        ticker = f"{share_class.group(1)}.{share_class.group(2)}"
+    return normalize_symbol(ticker)
+
+
+def iter_rows(payload):
+    """Yield the data rows of a JSON payload: dicts held in a list that carry a symbol or company name.
+
+    Row containers are lists (Nasdaq "rows", NSE "data", event calendar lists), so column-label
+    dicts such as Nasdaq "headers" are never mistaken for rows.
+
+    >>> payload = {"data": {"headers": {"symbol": "Symbol", "name": "Company Name"},
+    ...                     "rows": [{"symbol": "AAPL", "name": "Apple Inc."}]}}
+    >>> [row["symbol"] for row in iter_rows(payload)]
+    ['AAPL']
+    """
+    stack = [(payload, False)]
+    while stack:
+        item, in_list = stack.pop()
+        if isinstance(item, dict):
+            if in_list and any(_present(item.get(key)) for key in SYMBOL_FIELDS + NAME_FIELDS):
+                yield item
+            stack.extend((value, False) for key, value in reversed(item.items())
+                         if isinstance(value, (dict, list)) and key not in HEADER_FIELDS)
+        elif isinstance(item, list):
+            stack.extend((value, True) for value in reversed(item))
+
+
+def _present(value):
+    """True for a usable field value (not None, empty or NaN)."""
+    return value is not None and value == value and value != ""
+
+
+def _first(row, fields):
+    return next((row[key] for key in fields if _present(row.get(key))), None)
+
+
+class SymbolIndex:
+    """Symbol master index shared by the collectors.
+
+    Every company is keyed by market and normalized ticker ("US:AAPL", "NSE:TCS"), since the same
+    ticker can belong to different companies on different markets. Normalized company names are
+    kept as aliases within their market, so a Nasdaq ticker, an investing.com "Company (TICKER)"
+    string and a company name all resolve to the same key through dictionary lookups.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        :param db_path: SQLite file the index is loaded from and saved to (None keeps it in memory only,
+            in which case save() is not available).
+        """
+        self.db_path = db_path
+        self.symbols = {}
+        self.name_aliases = {}
+        self.markets = set()
+        self.conflicts = []
+        if db_path:
+            self._load()
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path))
+
+    def _load(self):
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            for symbol_key, market, symbol, name, exchange, source in conn.execute(
+                    "SELECT symbol_key, market, symbol, name, exchange, source FROM symbols"):
+                self.symbols[symbol_key] = {"market": market, "symbol": symbol, "name": name,
+                                            "exchange": exchange, "source": source}
+                self.markets.add(market)
+            self.name_aliases = dict(conn.execute("SELECT name_key, symbol_key FROM name_aliases"))
+
+    def save(self):
+        """Persist the index to db_path."""
+        if not self.db_path:
+            raise ValueError("SymbolIndex was created without a db_path and cannot be saved")
+        with self._connect() as conn, conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.executemany("INSERT OR REPLACE INTO symbols (symbol_key, market, symbol, name, exchange, source) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             [(symbol_key, info["market"], info["symbol"], info["name"], info["exchange"],
+                               info["source"]) for symbol_key, info in self.symbols.items()])
+            conn.executemany("INSERT OR REPLACE INTO name_aliases (name_key, symbol_key) VALUES (?, ?)",
+                             self.name_aliases.items())
+
+    def add(self, source, symbol, name=None, exchange=None, market=None):
+        """Register a symbol and its company name; the first symbol seen for a name keeps the alias.
+        A symbol already registered under a different company name is reported in conflicts and kept as is.
+        :param market: Market the symbol trades on (defaults to SOURCE_MARKETS[source]).
+        :return: Symbol key, e.g. "US:AAPL".
+        """
+        market = self._market(source, market)
+        symbol = normalize_symbol(symbol)
+        symbol_key = f"{market}:{symbol}"
+        name_key = normalize_name(name) if _present(name) else ""
+
+        info = self.symbols.get(symbol_key)
+        if info is None:
+            self.symbols[symbol_key] = {"market": market, "symbol": symbol, "name": name if name_key else None,
+                                        "exchange": exchange, "source": source}
+            self.markets.add(market)
+        else:
+            if name_key and info["name"] and normalize_name(info["name"]) != name_key:
+                conflict = (symbol_key, info["name"], info["source"], name, source)
+                if conflict not in self.conflicts:
+                    print(f"Symbol conflict for {symbol_key}: {info['name']!r} ({info['source']}) "
+                          f"vs {name!r} ({source}), keeping the first")
+                    self.conflicts.append(conflict)
+            if name_key and not info["name"]:
+                info["name"] = name
+            info["exchange"] = info["exchange"] or exchange
+
+        if name_key:
+            self.name_aliases.setdefault(f"{market}:{name_key}", symbol_key)
+        return symbol_key
+
+    @staticmethod
+    def _market(source, market=None):
+        return market or SOURCE_MARKETS.get(source, source.upper())
+
+    def add_payload(self, source, payload, market=None):
+        """Register every symbol found in a collector payload (Nasdaq search_stocks/calendars,
+        NSE 52-week and event calendar feeds, ...).
+        A ticker only found in "Company (TICKER)" is not added as a new symbol when the name
+        already resolves in the market, since such tickers are written differently per source.
+        :return: Number of rows registered.
+        """
+        count = 0
+        for row in iter_rows(payload):
+            name = _first(row, NAME_FIELDS)
+            symbol = _first(row, SYMBOL_FIELDS)
+            if not symbol and name:
+                symbol = ticker_in_parentheses(name)
+                if symbol and self._lookup_in_market(name, self._market(source, market)):
+                    count += 1
+                    continue
+            if symbol:
+                self.add(source, symbol, name, _first(row, EXCHANGE_FIELDS), market)
+                count += 1
+        return count
+
+    def add_frame(self, source, df, name_col="Company", symbol_col=None, market=None):
+        """Register the rows of a DataFrame, e.g. EarningsCalendarParser output.
+        Without symbol_col, the ticker is read from the parentheses in name_col.
+        :return: Number of rows registered.
+        """
+        records = df[[name_col] + ([symbol_col] if symbol_col else [])].to_dict("records")
+        rows = [{"name": r[name_col], "symbol": r.get(symbol_col)} for r in records]
+        return self.add_payload(source, [{key: value for key, value in row.items() if _present(value)}
+                                         for row in rows], market)
+
+    def lookup(self, value, market=None):
+        """Resolve a ticker, "Company (TICKER)" string or company name to its symbol key, or None.
+        Without a market, every known market is tried and a value matching more than one is treated as ambiguous.
+        """
+        if not _present(value):
+            return None
+        if value in self.symbols:
+            return value
+
+        markets = [market] if market else self.markets
+        matches = {match for match in (self._lookup_in_market(value, m) for m in markets) if match}
+        return matches.pop() if len(matches) == 1 else None
+
+    def _lookup_in_market(self, value, market):
+        symbol = ticker_in_parentheses(value)
+        if symbol and f"{market}:{symbol}" in self.symbols:
+            return f"{market}:{symbol}"
+        symbol_key = f"{market}:{normalize_symbol(value)}"
+        if symbol_key in self.symbols:
+            return symbol_key
+        return self.name_aliases.get(f"{market}:{normalize_name(value)}")
+
+    def resolve(self, values: pd.Series, market=None) -> pd.Series:
+        """Vectorized lookup: resolve each distinct value once and map the result over the series."""
+        uniques = values.dropna().unique()
+        return values.map({value: self.lookup(value, market) for value in uniques})
+
+    def join(self, left: pd.DataFrame, right: pd.DataFrame, left_on, right_on, how="inner", key="symbol_key",
+             market=None):
+        """Join two collector frames on resolved symbol keys instead of fuzzy string matching.
+        :param left_on: Column in left holding tickers or company names.
+        :param right_on: Column in right holding tickers or company names.
+        :param key: Name of the resolved key column added to the result.
+        :param market: Market both frames belong to, e.g. "US" (None tries every market).
+        Unresolved rows are kept by left, right and outer joins, with a null key.
+        """
+        left = left.assign(**{key: self._join_keys(left[left_on], market, "left")})
+        right = right.assign(**{key: self._join_keys(right[right_on], market, "right")})
+        merged = left.merge(right, on=key, how=how, suffixes=("", "_right"))
+        merged[key] = merged[key].mask(merged[key].str.startswith(_UNRESOLVED, na=False))
+        return merged
+
+    def _join_keys(self, values, market, side):
+        """Resolved keys with a unique placeholder per unresolved row, so null keys never match each other."""
+        keys = self.resolve(values, market)
+        return keys.where(keys.notna(), [f"{_UNRESOLVED}{side}:{i}" for i in range(len(keys))])
+
+
+if __name__ == "__main__":
+    from datetime import date
+
+    from country.UnitedStates.exchange.nasdaq import NasdaqAPI
+
+    # Daily "earnings today x 52-week highs" cross-reference
+    nasdaq_api = NasdaqAPI()
+    index = SymbolIndex("symbols.sqlite3")
+    earnings = nasdaq_api.get_earnings_calendar(date.today().isoformat())
+    highs = nasdaq_api.get_52_week_high_low(status="Hi")
+    index.add_payload("nasdaq", earnings)
+    index.add_payload("nasdaq", highs)
+    index.save()
+
+    earnings_df = pd.DataFrame(list(iter_rows(earnings)))
+    highs_df = pd.DataFrame(list(iter_rows(highs)))
+    if not earnings_df.empty and not highs_df.empty:
+        print(index.join(earnings_df, highs_df, left_on="symbol", right_on="symbol", market="US"))
@@ -27,6 +27,28 @@ class TreasuryInterestRatesHistorical:
         rates_type = interest_rates_type.value[0]
         base_year = interest_rates_type.value[1]
         print(f"Fetching {interest_rates_type.name} data for {base_year} year")
+        url_list = TreasuryInterestRatesHistorical.build_url_list(interest_rates_type, start_year, end_year)
+
+        if url_list:
+            with requests.Session() as session:
+                for key, url in url_list.items():
+                    print(f"Downloading: {url}")
+                    try:
+                        TreasuryInterestRatesHistorical.download(session, key, url, rates_type)
+                    except requests.exceptions.HTTPError as e:
+                        print(f"Failed to fetch data for {key}. {e}")
+                    except requests.exceptions.RequestException as e:
+                        print(f"Failed to fetch {url}: {e}")
+
+    @staticmethod
+    def build_url_list(interest_rates_type: InterestRatesType, start_year: int, end_year: int):
+        """Build the download URLs for a given type, keyed by year.
+        :param interest_rates_type: Type of interest rates (Enum)
+        :param start_year: Year from which to start downloading
+        :param end_year: Year to which to stop downloading
+        """
+        rates_type = interest_rates_type.value[0]
+        base_year = interest_rates_type.value[1]
         url_list = {}
         if start_year and end_year:
             if start_year < base_year:
@@ -36,20 +58,16 @@ class TreasuryInterestRatesHistorical:
                 url_list[
                     start_year] = f"{INTEREST_RATES_URL}{start_year}/all?type={rates_type}&field_tdr_date_value={start_year}&page&_format=csv"
                 start_year += 1
+        return url_list
 
-        if url_list:
-            with requests.Session() as session:
-                for key, url in url_list.items():
-                    print(f"Downloading: {url}")
-                    try:
-                        response = session.get(url, timeout=30)
-                        if response.status_code == 200:
-                            csv_data = StringIO(response.text)
-                            pd.read_csv(csv_data).to_csv(f"{key}_{rates_type}.csv", index=False)
-                        else:
-                            print(f"Failed to fetch data for {key}. HTTP Status:", response.status_code)
-                    except requests.exceptions.RequestException as e:
-                        print(f"Failed to fetch {url}: {e}")
+    @staticmethod
+    def download(session, key, url, rates_type):
+        """Download a single year of rates and store it as CSV, raising on a non-200 response."""
+        response = session.get(url, timeout=30)
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"HTTP Status: {response.status_code}", response=response)
+        csv_data = StringIO(response.text)
+        pd.read_csv(csv_data).to_csv(f"{key}_{rates_type}.csv", index=False)
 
 
 if __name__ == '__main__':